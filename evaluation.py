@@ -0,0 +1,352 @@
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from util.data_loader import load_mileposts, read_incident_chunks
+from util.features import SOURCE_LOG, build_features, encode_flag
+
+
+# ======================================================
+# STREAMING METRIC ACCUMULATORS
+# ======================================================
+class RegressionStats:
+    """Running RMSE / MAE / R² from sufficient statistics (constant memory)."""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_abs_err = 0.0
+        self.sum_sq_err = 0.0
+        self.sum_y = 0.0
+        self.sum_y_sq = 0.0
+
+    def update(self, y_true, y_pred):
+        err = y_pred - y_true
+        self.n += len(y_true)
+        self.sum_abs_err += float(np.abs(err).sum())
+        self.sum_sq_err += float((err ** 2).sum())
+        self.sum_y += float(y_true.sum())
+        self.sum_y_sq += float((y_true ** 2).sum())
+
+    def result(self) -> dict:
+        if self.n == 0:
+            return {"n": 0, "rmse": None, "mae": None, "r2": None}
+        total_ss = self.sum_y_sq - self.sum_y ** 2 / self.n
+        return {
+            "n": self.n,
+            "rmse": (self.sum_sq_err / self.n) ** 0.5,
+            "mae": self.sum_abs_err / self.n,
+            "r2": 1 - self.sum_sq_err / total_ss if total_ss > 0 else None,
+        }
+
+
+class ClassificationStats:
+    """Running confusion matrix plus binned-score ROC-AUC (constant memory).
+
+    ROC-AUC is approximate: scores falling in the same of `n_bins` equal-width
+    bins count as ties, which pulls the estimate slightly toward 0.5.
+    """
+
+    def __init__(self, n_bins: int = 200):
+        self.n_bins = n_bins
+        self.tp = self.fp = self.tn = self.fn = 0
+        self.pos_hist = np.zeros(n_bins, dtype=np.int64)
+        self.neg_hist = np.zeros(n_bins, dtype=np.int64)
+
+    def update(self, y_true, y_pred, y_prob):
+        y_true = y_true.astype(bool)
+        y_pred = y_pred.astype(bool)
+        self.tp += int((y_true & y_pred).sum())
+        self.fp += int((~y_true & y_pred).sum())
+        self.tn += int((~y_true & ~y_pred).sum())
+        self.fn += int((y_true & ~y_pred).sum())
+
+        bins = np.clip((y_prob * self.n_bins).astype(int), 0, self.n_bins - 1)
+        self.pos_hist += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.neg_hist += np.bincount(bins[~y_true], minlength=self.n_bins)
+
+    def roc_auc(self):
+        n_pos, n_neg = self.pos_hist.sum(), self.neg_hist.sum()
+        if n_pos == 0 or n_neg == 0:
+            return None
+        # P(score_pos > score_neg), ties within a bin count half
+        neg_below = np.cumsum(self.neg_hist) - self.neg_hist
+        wins = (self.pos_hist * (neg_below + 0.5 * self.neg_hist)).sum()
+        return float(wins / (n_pos * n_neg))
+
+    def result(self) -> dict:
+        n = self.tp + self.fp + self.tn + self.fn
+        if n == 0:
+            return {"n": 0, "f1_score": None, "precision": None, "recall": None,
+                    "accuracy": None, "roc_auc": None, "roc_auc_bins": self.n_bins}
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            "n": n,
+            "f1_score": f1,
+            "precision": precision,
+            "recall": recall,
+            "accuracy": (self.tp + self.tn) / n,
+            "roc_auc": self.roc_auc(),
+            "roc_auc_bins": self.n_bins,
+        }
+
+
+class EvaluationStats:
+    """Classification + regression accumulators for one slice of the data."""
+
+    def __init__(self, auc_bins: int = 200):
+        self.rows = 0
+        self.classification = ClassificationStats(auc_bins)
+        self.regression = RegressionStats()
+
+    def update(self, labels, clf_pred, clf_prob, delays, reg_pred):
+        self.rows += len(clf_pred)
+        has_label = ~np.isnan(labels)
+        if has_label.any():
+            self.classification.update(labels[has_label], clf_pred[has_label], clf_prob[has_label])
+        has_delay = ~np.isnan(delays)
+        if has_delay.any():
+            self.regression.update(delays[has_delay], reg_pred[has_delay])
+
+    def result(self) -> dict:
+        return {
+            "rows": self.rows,
+            "classification_metrics": self.classification.result(),
+            "regression_metrics": self.regression.result(),
+        }
+
+
+# ======================================================
+# REPLAY
+# ======================================================
+SLICE_COLUMNS = {
+    "hour": "hour",
+    "zone": "location_zone",
+    "incident_type": "incident_type_encoded",
+}
+
+
+def _target(chunk, column, flag=False):
+    """Target column as float array (NaN where missing or unparseable)."""
+    if column not in chunk.columns:
+        return np.full(len(chunk), np.nan)
+    if flag:
+        return encode_flag(chunk[column]).to_numpy()
+    return pd.to_numeric(chunk[column], errors="coerce").astype(float).to_numpy()
+
+
+def _positive_class_index(clf_model) -> int:
+    """Column of predict_proba holding the high-impact (label 1) class."""
+    matches = np.flatnonzero(clf_model.classes_ == 1)
+    if len(matches) == 0:
+        raise ValueError(f"Classifier has no positive class 1 (classes: {clf_model.classes_}).")
+    return int(matches[0])
+
+
+def replay_incidents(
+    path: str,
+    clf_model,
+    reg_model,
+    feature_list: list,
+    sorted_mileposts: np.ndarray,
+    chunksize: int = 50_000,
+    delay_col: str = "delay_minutes",
+    label_col: str = "high_impact",
+    high_impact_threshold: float = None,
+    auc_bins: int = 200,
+) -> dict:
+    """Stream a historical incident file through the models and score it.
+
+    Metrics are accumulated chunk by chunk, so memory stays bounded by the
+    chunk size regardless of file length. If the log has no label column,
+    the high-impact label can be derived from the observed delay with
+    `high_impact_threshold`; it must match how the training labels were
+    defined, or the classification metrics are not comparable.
+
+    Rows with a missing milepost, unparseable timestamp, non-numeric encoded
+    feature or unrecognised raw value are skipped and counted in
+    `rows_skipped`, so `rows + rows_skipped == rows_read`. `feature_sources`
+    records which features were read from the log, derived, estimated or
+    defaulted.
+    """
+    positive = _positive_class_index(clf_model)
+    overall = EvaluationStats(auc_bins)
+    slices = {name: {} for name in SLICE_COLUMNS}
+    feature_sources = {}
+    skipped = {}
+    timings = {"load": 0.0, "features": 0.0, "predict": 0.0, "metrics": 0.0}
+    n_chunks = 0
+    rows_read = 0
+    slowest_chunk_rps = None
+
+    start = time.perf_counter()
+    chunks = read_incident_chunks(path, chunksize=chunksize)
+    while True:
+        t0 = time.perf_counter()
+        chunk = next(chunks, None)
+        t1 = time.perf_counter()
+        timings["load"] += t1 - t0
+        if chunk is None:
+            break
+        n_chunks += 1
+        rows_read += len(chunk)
+
+        # --- Features ---
+        features, sources, chunk_skipped = build_features(chunk, sorted_mileposts)
+        feature_sources.update(sources)
+        for feature, count in chunk_skipped.items():
+            skipped[feature] = skipped.get(feature, 0) + count
+        t2 = time.perf_counter()
+        timings["features"] += t2 - t1
+        if features.empty:
+            continue
+        chunk = chunk.loc[features.index]
+        X = features[feature_list].to_numpy()
+
+        # --- Predictions (same post-processing as predict_incident_impact) ---
+        proba = clf_model.predict_proba(X)
+        clf_prob = proba[:, positive]
+        clf_pred = (clf_model.classes_.take(proba.argmax(axis=1)) == 1).astype(int)
+        reg_pred = np.maximum(0, reg_model.predict(X))
+        t3 = time.perf_counter()
+
+        # --- Targets ---
+        delays = _target(chunk, delay_col)
+        labels = _target(chunk, label_col, flag=True)
+        if label_col not in chunk.columns and high_impact_threshold is not None:
+            labels = np.where(np.isnan(delays), np.nan, (delays >= high_impact_threshold).astype(float))
+
+        # --- Metrics ---
+        overall.update(labels, clf_pred, clf_prob, delays, reg_pred)
+        for name, column in SLICE_COLUMNS.items():
+            for value, idx in features.groupby(column).indices.items():
+                stats = slices[name].setdefault(int(value), EvaluationStats(auc_bins))
+                stats.update(labels[idx], clf_pred[idx], clf_prob[idx], delays[idx], reg_pred[idx])
+        t4 = time.perf_counter()
+
+        timings["predict"] += t3 - t2
+        timings["metrics"] += t4 - t3
+        chunk_rps = len(chunk) / max(t4 - t0, 1e-9)
+        slowest_chunk_rps = chunk_rps if slowest_chunk_rps is None else min(slowest_chunk_rps, chunk_rps)
+
+    elapsed = time.perf_counter() - start
+
+    report = overall.result()
+    report["rows_read"] = rows_read
+    report["rows_skipped"] = sum(skipped.values())
+    report["skipped_by_feature"] = skipped
+    report["feature_sources"] = feature_sources
+    report["slices"] = {
+        name: {str(value): stats.result() for value, stats in sorted(groups.items())}
+        for name, groups in slices.items()
+    }
+    report["throughput"] = {
+        "chunks": n_chunks,
+        "chunksize": chunksize,
+        "elapsed_seconds": elapsed,
+        "rows_per_second": overall.rows / elapsed if elapsed > 0 else None,
+        "slowest_chunk_rows_per_second": slowest_chunk_rps,
+        "stage_seconds": timings,
+    }
+    return report
+
+
+def compare_to_metadata(report: dict, metadata: dict) -> dict:
+    """Replay metric minus training-time metric, per metric in model_metadata.json."""
+    drift = {}
+    for section in ("classification_metrics", "regression_metrics"):
+        for name, baseline in metadata.get(section, {}).items():
+            current = report[section].get(name)
+            if not isinstance(baseline, (int, float)):
+                continue
+            drift[name] = {
+                "baseline": baseline,
+                "replay": current,
+                "delta": current - baseline if current is not None else None,
+            }
+    return drift
+
+
+# ======================================================
+# COMMAND LINE
+# ======================================================
+def _fmt(value, spec):
+    return "n/a" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay historical I-5 incidents through the impact models.")
+    parser.add_argument("incidents", help="Historical incident CSV (same format as load_incidents)")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--delay-col", default="delay_minutes")
+    parser.add_argument("--label-col", default="high_impact")
+    parser.add_argument("--high-impact-threshold", type=float, default=None,
+                        help="Derive the high-impact label as delay >= threshold when no label column "
+                             "exists; must match the training-time label definition")
+    parser.add_argument("--auc-bins", type=int, default=200,
+                        help="Score bins for the streaming ROC-AUC approximation")
+    parser.add_argument("--classifier", default="models/high_impact_classifier.joblib")
+    parser.add_argument("--regressor", default="models/delay_regressor.joblib")
+    parser.add_argument("--features", default="models/feature_list.json")
+    parser.add_argument("--metadata", default="models/model_metadata.json")
+    parser.add_argument("--mileposts", default="geodata/i5_milepost.geojson")
+    parser.add_argument("--output", default=None, help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    clf_model = joblib.load(args.classifier)
+    reg_model = joblib.load(args.regressor)
+    with open(args.features, "r") as f:
+        feature_list = json.load(f)
+    try:
+        with open(args.metadata, "r") as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        metadata = {}
+    mileposts = load_mileposts(args.mileposts)
+    sorted_mileposts = np.sort(mileposts["Milepost"].dropna().to_numpy(dtype=float))
+
+    report = replay_incidents(
+        args.incidents,
+        clf_model,
+        reg_model,
+        feature_list,
+        sorted_mileposts,
+        chunksize=args.chunksize,
+        delay_col=args.delay_col,
+        label_col=args.label_col,
+        high_impact_threshold=args.high_impact_threshold,
+        auc_bins=args.auc_bins,
+    )
+    report["drift"] = compare_to_metadata(report, metadata)
+
+    print("\n=== Replay Evaluation ===")
+    print(f"Rows Read: {report['rows_read']:,}")
+    print(f"Rows Scored: {report['rows']:,} (skipped: {report['rows_skipped']:,})")
+    for feature, count in report["skipped_by_feature"].items():
+        print(f"  skipped {count:,} rows with unusable {feature}")
+    for feature, source in report["feature_sources"].items():
+        if source != SOURCE_LOG:
+            print(f"  {feature}: {source}")
+    print(f"ROC-AUC approximated with {args.auc_bins} score bins")
+    for name, d in report["drift"].items():
+        print(f"{name:<10} replay {_fmt(d['replay'], '.3f'):>8}  "
+              f"baseline {_fmt(d['baseline'], '.3f'):>8}  delta {_fmt(d['delta'], '+.3f'):>8}")
+
+    t = report["throughput"]
+    print("\n=== Throughput ===")
+    print(f"Chunks: {t['chunks']} × {t['chunksize']:,} rows")
+    print(f"Elapsed: {t['elapsed_seconds']:.2f} s")
+    print(f"Rows/sec: {_fmt(t['rows_per_second'], ',.0f')} (slowest chunk: {_fmt(t['slowest_chunk_rows_per_second'], ',.0f')})")
+    print("Stage seconds: " + ", ".join(f"{k}={v:.2f}" for k, v in t["stage_seconds"].items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nFull report (with hour / zone / incident type slices) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.metrics import (
+    confusion_matrix, f1_score, mean_absolute_error, mean_squared_error, r2_score, roc_auc_score,
+)
+from evaluation import ClassificationStats, RegressionStats, replay_incidents
+from util.data_loader import iter_incidents, load_incidents, read_incident_chunks
+from util.features import build_features, encode_flag
+
+FEATURE_LIST_PATH = Path(__file__).resolve().parent.parent / "models" / "feature_list.json"
+SORTED_MILEPOSTS = np.linspace(0.0, 276.0, 277)
+UNEVEN_CHUNKS = [0, 7, 8, 150, 613, 1000]
+
+CSV = """NotifiedDateTime,Milepost,IncidentType,LaneClosure,Direction,Blocking,delay_minutes,high_impact
+2024-03-04 08:15:00,120.5,Injury Collision,Two Lanes,N,Yes,22.0,1
+2024-03-09 23:40:00,15.2,Debris,No Closure,S,No,3.5,0
+not-a-date,200.0,Disabled Vehicle,Shoulder,N,No,5.0,0
+2024-03-05 17:05:00,not-a-milepost,Debris,No Closure,S,No,1.0,0
+2024-03-06 00:10:00,250.0,Something New,One Lane,d,Yes,12.0,Yes
+"""
+
+
+def _chunks(*arrays):
+    for lo, hi in zip(UNEVEN_CHUNKS, UNEVEN_CHUNKS[1:]):
+        yield tuple(a[lo:hi] for a in arrays)
+
+
+@pytest.fixture
+def incident_csv(tmp_path):
+    path = tmp_path / "incidents.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+# ======================================================
+# STREAMING METRICS vs SKLEARN
+# ======================================================
+def test_classification_stats_match_sklearn():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 1000)
+    y_prob = np.clip(0.3 * y_true + rng.random(1000) * 0.7, 0, 1)
+    y_pred = (y_prob > 0.5).astype(int)
+
+    stats = ClassificationStats(n_bins=10_000)
+    for t, p, s in _chunks(y_true, y_pred, y_prob):
+        stats.update(t, p, s)
+    result = stats.result()
+
+    tn, fp, fn, tp = confusion_matrix(y_true, y_pred).ravel()
+    assert (stats.tn, stats.fp, stats.fn, stats.tp) == (tn, fp, fn, tp)
+    assert result["f1_score"] == pytest.approx(f1_score(y_true, y_pred))
+    assert result["roc_auc"] == pytest.approx(roc_auc_score(y_true, y_prob), abs=1e-3)
+    assert result["roc_auc_bins"] == 10_000
+
+
+def test_coarse_auc_bins_bias_toward_half():
+    rng = np.random.default_rng(1)
+    y_true = rng.integers(0, 2, 1000)
+    y_prob = np.clip(0.3 * y_true + rng.random(1000) * 0.7, 0, 1)
+
+    coarse = ClassificationStats(n_bins=2)
+    coarse.update(y_true, (y_prob > 0.5).astype(int), y_prob)
+    exact = roc_auc_score(y_true, y_prob)
+    assert 0.5 <= coarse.roc_auc() < exact
+
+
+def test_regression_stats_match_sklearn():
+    rng = np.random.default_rng(2)
+    y_true = rng.gamma(2.0, 5.0, 1000)
+    y_pred = y_true + rng.normal(0, 3, 1000)
+
+    stats = RegressionStats()
+    for t, p in _chunks(y_true, y_pred):
+        stats.update(t, p)
+    result = stats.result()
+
+    assert result["n"] == 1000
+    assert result["rmse"] == pytest.approx(mean_squared_error(y_true, y_pred) ** 0.5)
+    assert result["mae"] == pytest.approx(mean_absolute_error(y_true, y_pred))
+    assert result["r2"] == pytest.approx(r2_score(y_true, y_pred))
+
+
+# ======================================================
+# LOADING & FEATURES
+# ======================================================
+def test_iter_incidents_matches_load_incidents(incident_csv):
+    full = load_incidents(incident_csv)
+    streamed = pd.concat(list(iter_incidents(incident_csv, chunksize=2)))
+    # dtypes are inferred per chunk (mixed columns may come back as int or str)
+    pd.testing.assert_frame_equal(streamed.astype(str), full.astype(str))
+
+    streamed_features = pd.concat(
+        [build_features(chunk, SORTED_MILEPOSTS)[0] for chunk in iter_incidents(incident_csv, chunksize=2)]
+    )
+    pd.testing.assert_frame_equal(streamed_features, build_features(full, SORTED_MILEPOSTS)[0])
+
+
+def test_encode_flag_handles_per_chunk_bool_inference():
+    # a chunk holding only "true"/"false" is parsed as bool by pandas
+    assert encode_flag(pd.Series(["Yes", "no", "true", "1"])).tolist() == [1, 0, 1, 1]
+    assert encode_flag(pd.Series([True, False])).tolist() == [1, 0]
+    assert np.isnan(encode_flag(pd.Series(["maybe"]))[0])
+
+
+def test_build_features_matches_feature_list(incident_csv):
+    with open(FEATURE_LIST_PATH, "r") as f:
+        feature_list = json.load(f)
+    raw = pd.concat(list(read_incident_chunks(incident_csv)))
+    features, sources, skipped = build_features(raw, SORTED_MILEPOSTS)
+
+    assert sorted(features.columns) == sorted(feature_list)
+    assert set(sources) == set(feature_list)
+    # unparsed timestamp is dropped, not scored as hour 0
+    assert skipped == {"Milepost": 1, "hour": 1}
+    assert len(features) == 3
+    assert sources["location_zone"] == sources["severity_score"] == "heuristic"
+    assert features["incident_type_encoded"].tolist() == [4, 1, 7]
+    assert features["direction_encoded"].tolist() == [0, 1, 1]
+    assert features["blocking_encoded"].tolist() == [1, 0, 1]
+
+
+def test_build_features_skips_bad_encoded_values():
+    df = pd.DataFrame({
+        "NotifiedDateTime": pd.to_datetime(["2024-03-04 08:00", "2024-03-04 09:00"]),
+        "Milepost": [10.0, 20.0],
+    })
+    features, sources, skipped = build_features(df, SORTED_MILEPOSTS)
+    assert sources["incident_type_encoded"] == "default"
+
+    df["incident_type_encoded"] = ["3", None]
+    features, sources, skipped = build_features(df, SORTED_MILEPOSTS)
+    assert sources["incident_type_encoded"] == "log"
+    assert skipped == {"incident_type_encoded": 1}
+    assert features["incident_type_encoded"].tolist() == [3]
+
+
+def test_build_features_skips_unrecognised_raw_values():
+    df = pd.DataFrame({
+        "NotifiedDateTime": pd.to_datetime(["2024-03-04 08:00"] * 4),
+        "Milepost": [10.0, 20.0, 30.0, 40.0],
+        "Direction": ["N", "?", "S", "S"],
+        "LaneClosure": ["One Lane", "One Lane", "Half Lane", "No Closure"],
+        "Blocking": ["yes", "no", "no", "maybe"],
+    })
+    features, sources, skipped = build_features(df, SORTED_MILEPOSTS)
+    assert sources["direction_encoded"] == sources["lane_closure_encoded"] == "derived"
+    assert skipped == {"lane_closure_encoded": 1, "direction_encoded": 1, "blocking_encoded": 1}
+    assert features.index.tolist() == [0]
+
+
+# ======================================================
+# REPLAY
+# ======================================================
+def test_replay_matches_single_pass(tmp_path):
+    with open(FEATURE_LIST_PATH, "r") as f:
+        feature_list = json.load(f)
+    rng = np.random.default_rng(3)
+    n = 500
+    df = pd.DataFrame({
+        "NotifiedDateTime": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60 * 24 * 30, n), "min"),
+        "Milepost": rng.uniform(0, 276, n),
+        "incident_type_encoded": rng.integers(0, 8, n),
+        "blocking_encoded": rng.integers(0, 2, n),
+        "delay_minutes": rng.gamma(2.0, 5.0, n),
+    })
+    df["high_impact"] = np.where(df["delay_minutes"] > 15, "Yes", "No")
+    path = tmp_path / "replay.csv"
+    df.to_csv(path, index=False)
+
+    features, _, _ = build_features(load_incidents(str(path)), SORTED_MILEPOSTS)
+    X = features[feature_list].to_numpy()
+    y = (df["high_impact"] == "Yes").astype(int).to_numpy()
+    clf = LogisticRegression(max_iter=1000).fit(X, y)
+    reg = LinearRegression().fit(X, df["delay_minutes"])
+
+    report = replay_incidents(
+        str(path), clf, reg, feature_list, SORTED_MILEPOSTS, chunksize=77, auc_bins=10_000
+    )
+
+    assert report["rows"] == report["rows_read"] == n
+    assert report["rows_skipped"] == 0
+    assert report["classification_metrics"]["f1_score"] == pytest.approx(f1_score(y, clf.predict(X)))
+    assert report["classification_metrics"]["roc_auc"] == pytest.approx(
+        roc_auc_score(y, clf.predict_proba(X)[:, 1]), abs=1e-3
+    )
+    delay_pred = np.maximum(0, reg.predict(X))
+    assert report["regression_metrics"]["rmse"] == pytest.approx(
+        mean_squared_error(df["delay_minutes"], delay_pred) ** 0.5
+    )
+    assert sum(s["rows"] for s in report["slices"]["hour"].values()) == n
+    assert report["throughput"]["chunks"] == 7
+
+
+def test_replay_accounts_for_every_row_and_chunk(incident_csv):
+    with open(FEATURE_LIST_PATH, "r") as f:
+        feature_list = json.load(f)
+    raw = pd.concat(list(read_incident_chunks(incident_csv)))
+    features, _, _ = build_features(raw, SORTED_MILEPOSTS)
+    X = features[feature_list].to_numpy()
+    clf = LogisticRegression().fit(X, [1, 0, 1])
+    reg = LinearRegression().fit(X, [22.0, 3.5, 12.0])
+
+    report = replay_incidents(incident_csv, clf, reg, feature_list, SORTED_MILEPOSTS, chunksize=1)
+
+    assert report["rows_read"] == 5
+    assert report["rows"] + report["rows_skipped"] == report["rows_read"]
+    assert report["skipped_by_feature"] == {"Milepost": 1, "hour": 1}
+    # chunks whose only row is skipped still count, with their feature time
+    assert report["throughput"]["chunks"] == 5
+    assert report["throughput"]["stage_seconds"]["features"] > 0
@@ -7,16 +7,40 @@ from util.geo_utils import normalize_direction
 # --------------------------
 # Incident data
 # --------------------------
-@st.cache_data
-def load_incidents(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
+def _coerce_incidents(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce milepost/timestamp columns (unparseable values become NaN/NaT)."""
     df["Milepost"] = pd.to_numeric(df["Milepost"], errors="coerce").astype(float)
-    df = df.dropna(subset=["Milepost"])
     if "NotifiedDateTime" in df.columns:
         df["NotifiedDateTime"] = pd.to_datetime(df["NotifiedDateTime"], errors="coerce")
         df["hour"] = df["NotifiedDateTime"].dt.hour
     return df
 
+
+def _clean_incidents(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce milepost/timestamp columns and drop rows without a milepost."""
+    return _coerce_incidents(df).dropna(subset=["Milepost"])
+
+
+@st.cache_data
+def load_incidents(path: str) -> pd.DataFrame:
+    return _clean_incidents(pd.read_csv(path))
+
+
+def read_incident_chunks(path: str, chunksize: int = 50_000):
+    """Stream an incident CSV in coerced chunks, keeping rows without a milepost.
+
+    Column dtypes are inferred per chunk, so e.g. a chunk holding only
+    "true"/"false" yields bools where load_incidents would keep strings.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield _coerce_incidents(chunk)
+
+
+def iter_incidents(path: str, chunksize: int = 50_000):
+    """Stream an incident CSV in cleaned chunks (same cleaning as load_incidents)."""
+    for chunk in read_incident_chunks(path, chunksize):
+        yield chunk.dropna(subset=["Milepost"])
+
 # --------------------------
 # Milepost & I-5 GeoJSON
 # --------------------------
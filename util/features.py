@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from util.geo_utils import normalize_direction
+from util.sidebar_config import INCIDENT_TYPES, LANE_CLOSURES
+
+# ====== Raw incident log columns (used when an encoded column is absent) ======
+RAW_COLUMNS = {
+    "incident_type": "IncidentType",
+    "lane_closure": "LaneClosure",
+    "direction": "Direction",
+    "blocking": "Blocking",
+}
+
+# ====== Label -> code lookups (case-insensitive) ======
+INCIDENT_CODES = {label.lower(): code for code, label in INCIDENT_TYPES.items()}
+LANE_CODES = {label.lower(): code for code, label in LANE_CLOSURES.items()}
+UNKNOWN_INCIDENT = 7
+FLAG_CODES = {"1": 1, "y": 1, "yes": 1, "true": 1, "t": 1,
+              "0": 0, "n": 0, "no": 0, "false": 0, "f": 0}
+
+# ====== Feature sources reported by build_features ======
+# log       - encoded column read from the incident log
+# derived   - computed from other log fields, as the sidebar computes it
+# heuristic - estimated by a rule with no counterpart in the app (the sidebar
+#             takes location_zone and severity_score directly from the user)
+# default   - source column missing; constant fallback used for every row
+SOURCE_LOG, SOURCE_DERIVED, SOURCE_HEURISTIC, SOURCE_DEFAULT = "log", "derived", "heuristic", "default"
+
+
+def encode_flag(series: pd.Series) -> pd.Series:
+    """Map 0/1, yes/no, true/false style values to 1.0/0.0 (NaN if unrecognised)."""
+    numeric = pd.to_numeric(series, errors="coerce")
+    labels = series.astype(str).str.strip().str.lower().map(FLAG_CODES)
+    return numeric.fillna(labels).astype(float)
+
+
+def _encode_labels(series: pd.Series, codes: dict) -> pd.Series:
+    """Map text labels (or already-numeric codes) to codes (NaN if unrecognised)."""
+    numeric = pd.to_numeric(series, errors="coerce")
+    labels = series.astype(str).str.strip().str.lower().map(codes)
+    return numeric.fillna(labels).astype(float)
+
+
+def normalize_milepost(mileposts: pd.Series, sorted_mileposts: np.ndarray) -> np.ndarray:
+    """Inverse of get_approx_milepost_number: milepost value -> 0–1 position."""
+    if len(sorted_mileposts) < 2:
+        return np.zeros(len(mileposts))
+    idx = np.searchsorted(sorted_mileposts, mileposts.to_numpy(dtype=float))
+    return np.clip(idx / (len(sorted_mileposts) - 1), 0.0, 1.0)
+
+
+def build_features(df: pd.DataFrame, sorted_mileposts: np.ndarray):
+    """Build the model feature frame from coerced incident rows (see read_incident_chunks).
+
+    Returns (features, sources, skipped):
+      - features: one row per usable incident, indexed like `df`
+      - sources:  feature name -> "log" / "derived" / "heuristic" / "default"
+      - skipped:  feature name -> rows dropped because that feature was
+                  unusable (missing milepost, unparsed timestamp, non-numeric
+                  encoded value, or unrecognised direction / lane closure /
+                  blocking value)
+
+    Encoded columns present in the log are used as-is. The time flags,
+    milepost position and rush/blocking interaction are derived the way the
+    sidebar computes them. If the log lacks `location_zone` or
+    `severity_score`, they are filled by heuristics (zone = tenth of the
+    corridor, severity from collision type) that the app itself never uses.
+    Unrecognised incident type labels map to 7 ("Unknown").
+    Raises KeyError if the log has no usable time columns.
+    """
+    out = pd.DataFrame(index=df.index)
+    sources = {}
+    invalid = {"Milepost": df["Milepost"].isna()}
+
+    def from_raw(feature, values):
+        invalid[feature] = values.isna()
+        sources[feature] = SOURCE_DERIVED
+        return values.fillna(0).astype(int)
+
+    def from_log(column, dtype=int):
+        values = pd.to_numeric(df[column], errors="coerce")
+        invalid[column] = values.isna()
+        sources[column] = SOURCE_LOG
+        return values.fillna(0).astype(dtype)
+
+    # ------------------------------
+    # Time features
+    # ------------------------------
+    for feature, accessor in (("hour", "hour"), ("day_of_week", "dayofweek")):
+        if "NotifiedDateTime" in df.columns:
+            values = getattr(df["NotifiedDateTime"].dt, accessor)
+            invalid[feature] = values.isna()
+            sources[feature] = SOURCE_DERIVED
+            out[feature] = values.fillna(0).astype(int)
+        elif feature in df.columns:
+            out[feature] = from_log(feature)
+        else:
+            raise KeyError(f"Incident log needs 'NotifiedDateTime' or '{feature}' column.")
+
+    out["is_weekend"] = (out["day_of_week"] >= 5).astype(int)
+    rush = out["hour"].between(7, 10) | out["hour"].between(16, 19)
+    out["is_rush_hour"] = (rush & (out["is_weekend"] == 0)).astype(int)
+    sources["is_weekend"] = sources["is_rush_hour"] = SOURCE_DERIVED
+
+    # ------------------------------
+    # Location features
+    # ------------------------------
+    if "milepost_normalized" in df.columns:
+        out["milepost_normalized"] = from_log("milepost_normalized", float)
+    else:
+        out["milepost_normalized"] = normalize_milepost(df["Milepost"], sorted_mileposts)
+        sources["milepost_normalized"] = SOURCE_DERIVED
+
+    if "location_zone" in df.columns:
+        out["location_zone"] = from_log("location_zone")
+    else:
+        out["location_zone"] = np.minimum((out["milepost_normalized"] * 10).astype(int), 9)
+        sources["location_zone"] = SOURCE_HEURISTIC
+
+    # ------------------------------
+    # Incident characteristics
+    # ------------------------------
+    if "incident_type_encoded" in df.columns:
+        out["incident_type_encoded"] = from_log("incident_type_encoded")
+    elif RAW_COLUMNS["incident_type"] in df.columns:
+        out["incident_type_encoded"] = _encode_labels(
+            df[RAW_COLUMNS["incident_type"]], INCIDENT_CODES
+        ).fillna(UNKNOWN_INCIDENT).astype(int)
+        sources["incident_type_encoded"] = SOURCE_DERIVED
+    else:
+        out["incident_type_encoded"] = UNKNOWN_INCIDENT
+        sources["incident_type_encoded"] = SOURCE_DEFAULT
+
+    if "lane_closure_encoded" in df.columns:
+        out["lane_closure_encoded"] = from_log("lane_closure_encoded")
+    elif RAW_COLUMNS["lane_closure"] in df.columns:
+        out["lane_closure_encoded"] = from_raw(
+            "lane_closure_encoded", _encode_labels(df[RAW_COLUMNS["lane_closure"]], LANE_CODES)
+        )
+    else:
+        out["lane_closure_encoded"] = 0
+        sources["lane_closure_encoded"] = SOURCE_DEFAULT
+
+    if "direction_encoded" in df.columns:
+        out["direction_encoded"] = from_log("direction_encoded")
+    elif RAW_COLUMNS["direction"] in df.columns:
+        direction = df[RAW_COLUMNS["direction"]].apply(normalize_direction)
+        codes = direction.map({"N": 0, "S": 1}).astype(float)  # 0 = NB, 1 = SB
+        out["direction_encoded"] = from_raw("direction_encoded", codes)
+    else:
+        out["direction_encoded"] = 0
+        sources["direction_encoded"] = SOURCE_DEFAULT
+
+    if "blocking_encoded" in df.columns:
+        out["blocking_encoded"] = from_log("blocking_encoded")
+    elif RAW_COLUMNS["blocking"] in df.columns:
+        out["blocking_encoded"] = from_raw("blocking_encoded", encode_flag(df[RAW_COLUMNS["blocking"]]))
+    else:
+        out["blocking_encoded"] = 0
+        sources["blocking_encoded"] = SOURCE_DEFAULT
+
+    if "severity_score" in df.columns:
+        out["severity_score"] = from_log("severity_score")
+    else:
+        # Injury/fatality collisions = 3, other collisions = 2, everything else = 1
+        itype = out["incident_type_encoded"]
+        out["severity_score"] = np.select([itype.isin([4, 5]), itype == 3], [3, 2], default=1)
+        sources["severity_score"] = SOURCE_HEURISTIC
+
+    out["rush_blocking_interaction"] = (
+        (out["is_rush_hour"] == 1) & (out["blocking_encoded"] == 1)
+    ).astype(int)
+    sources["rush_blocking_interaction"] = SOURCE_DERIVED
+
+    # ------------------------------
+    # Drop unusable rows (each counted once, under the first bad feature)
+    # ------------------------------
+    dropped = pd.Series(False, index=df.index)
+    skipped = {}
+    for feature, mask in invalid.items():
+        new = mask & ~dropped
+        if new.any():
+            skipped[feature] = int(new.sum())
+        dropped |= mask
+
+    return out[~dropped], sources, skipped